@@ -7,20 +7,86 @@ the inspiration.
 
 from __future__ import annotations
 
-import datetime
+import concurrent.futures
+import ctypes
+import fcntl
+import functools
+import itertools
 import logging
 import os
+import select
 import shutil
 import subprocess
+import tempfile
 import time
 from pathlib import Path
-from typing import Callable
+from typing import Any, Callable, Iterable, Iterator, Sequence
 
 import click
 import yaml
 
+try:
+    from yaml import CSafeLoader as _YAMLLoader
+except ImportError:  # pragma: no cover
+    # PyYAML was built without libyaml.
+    from yaml import SafeLoader as _YAMLLoader  # type: ignore[assignment]
+
 LOGGER = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
+
+# UnionFS marks a deleted object by creating a file or directory with the
+# object's name followed by this suffix.
+_HIDDEN_FLAG = '_HIDDEN~'
+
+# Executables which every command needs.
+# ``rclone`` is also needed but its path comes from the configuration file.
+_DEPENDENCIES = frozenset({'unionfs-fuse', 'encfs', 'fusermount'})
+
+# rclone retries a whole command, such as a copy or a delete, after errors.
+# Errors are often caused by rate limiting, so retrying immediately tends to
+# fail again.
+_RCLONE_RETRIES_SLEEP_ARGS = ('--retries-sleep', '30s')
+
+_REQUIRED_CONFIG_KEYS = frozenset(
+    {
+        'cloud_drive_tools_path',
+        'data_dir',
+        'days_to_keep_local',
+        'encfs6_config',
+        'encfs_pass',
+        'max_retries_remote_mount',
+        'mount_base',
+        'path_on_cloud_drive',
+        'rclone',
+        'rclone_config_path',
+        'rclone_remote',
+        'rclone_verbose',
+    },
+)
+_OPTIONAL_CONFIG_KEYS = frozenset({'rclone_checkers', 'rclone_transfers'})
+_ALLOWED_CONFIG_KEYS = _REQUIRED_CONFIG_KEYS | _OPTIONAL_CONFIG_KEYS
+
+_MODULE_DIR = Path(__file__).parent
+_UNMOUNT_LOCK_FILE = _MODULE_DIR / 'cloud-drive-tools-unmount.lock'
+_UPLOAD_PID_FILE = _MODULE_DIR / 'upload.pid'
+_PROC_MOUNTS = Path('/proc/mounts')
+_PROC_SELF_MOUNTS = Path('/proc/self/mounts')
+
+# ``/proc/mounts`` separates fields with spaces, so it writes these
+# characters in paths as octal escapes.
+# The backslash comes first so that we do not escape our own escapes.
+_PROC_MOUNTS_ESCAPES = (
+    (b'\\', b'\\134'),
+    (b' ', b'\\040'),
+    (b'\t', b'\\011'),
+    (b'\n', b'\\012'),
+)
+
+# encfs runs ``--extpass`` with ``/bin/sh``.
+# We give it the password in the environment rather than in the command,
+# where any user can see it in the process list and where the shell would
+# interpret special characters in it.
+_ENCFS_PASS_ENV_VAR = 'CLOUD_DRIVE_TOOLS_ENCFS_PASS'
+_ENCFS_EXTPASS = f'printf "%s\\n" "${_ENCFS_PASS_ENV_VAR}"'
 
 
 class _Config:
@@ -38,9 +104,14 @@ class _Config:
         rclone_config_path: Path,
         rclone_remote: str,
         rclone_verbose: bool,
+        rclone_checkers: int | None,
+        rclone_transfers: int | None,
     ):
         """
         Configuration for cloud drive tools.
+
+        ``rclone_checkers`` and ``rclone_transfers`` are ``None`` to use the
+        ``rclone`` defaults.
         """
         self.cloud_drive_tools_path = cloud_drive_tools_path
         self.data_dir = data_dir
@@ -55,15 +126,40 @@ class _Config:
         self.rclone_config_path = rclone_config_path
         self.rclone_remote = rclone_remote
         self.rclone_verbose = rclone_verbose
+        self.rclone_checkers = rclone_checkers
+        self.rclone_transfers = rclone_transfers
         self._mount_base = mount_base
         self.remote_encrypted = mount_base / 'cloud-drive-encrypted'
         self.remote_decrypted = mount_base / 'cloud-drive-decrypted'
         self.local_encrypted = mount_base / 'local-encrypted'
         self.local_decrypted = mount_base / 'local-decrypted'
-        unmount_lock_file_name = 'cloud-drive-tools-unmount.lock'
-        self.unmount_lock_file = Path(__file__).parent / unmount_lock_file_name
-        # We should probably explicitly pass this to subprocesses.
-        os.environ['ENCFS6_CONFIG'] = str(encfs6_config)
+        self.unmount_lock_file = _UNMOUNT_LOCK_FILE
+
+    @functools.cached_property
+    def rclone_base_args(self) -> tuple[str, ...]:
+        """
+        The ``rclone`` executable and the global options to use with it.
+        """
+        return (
+            str(self.rclone),
+            '--config',
+            str(self.rclone_config_path),
+            _rclone_verbosity_flag(verbose=self.rclone_verbose),
+        )
+
+    @functools.cached_property
+    def remote_mount(self) -> Path:
+        """
+        The directory on the cloud drive mount which holds our data.
+
+        This is computed on first use because it requires
+        ``path_on_cloud_drive`` to be absolute, and only some commands use
+        it.
+        """
+        relative_path_on_cloud_drive = Path(
+            self.path_on_cloud_drive,
+        ).relative_to('/')
+        return self.remote_encrypted / relative_path_on_cloud_drive
 
 
 @click.group(name='cloud-drive-tools')
@@ -71,10 +167,13 @@ def cloud_drive_tools() -> None:
     """
     Manage Plex tools.
     """
-    dependencies = ('unionfs-fuse', 'encfs', 'fusermount')
-    for dependency in dependencies:
+    # This is configured here rather than on import so that importing this
+    # module does not change logging for the importing program.
+    logging.basicConfig(level=logging.INFO)
+
+    for dependency in sorted(_DEPENDENCIES):
         message = f'"{dependency}" is not available on the PATH.'
-        assert shutil.which(str(dependency)) is not None, message
+        assert shutil.which(dependency) is not None, message
 
 
 def _rclone_verbosity_flag(verbose: bool) -> str:
@@ -100,6 +199,27 @@ def _rclone_path(
     return f'{rclone_remote}:{rclone_root}/{rclone_relative_path}'
 
 
+def _load_config_file(config_file_path: Path) -> dict[str, Any]:
+    """
+    Return the parsed contents of a configuration file.
+    """
+    # Passing bytes lets libyaml read and decode the file itself.
+    with config_file_path.open('rb') as config_file:
+        config: dict[str, Any] = (
+            yaml.load(config_file, Loader=_YAMLLoader) or {}
+        )
+    return config
+
+
+def _optional_int(value: Any) -> int | None:
+    """
+    Return the given optional configuration value as an integer.
+    """
+    if value is None:
+        return None
+    return int(value)
+
+
 def _get_config(
     ctx: click.core.Context,
     param: click.core.Option | click.core.Parameter,
@@ -109,30 +229,11 @@ def _get_config(
     for _ in (ctx, param):
         pass
 
-    required_keys = set(
-        [
-            'cloud_drive_tools_path',
-            'data_dir',
-            'days_to_keep_local',
-            'encfs6_config',
-            'encfs_pass',
-            'max_retries_remote_mount',
-            'mount_base',
-            'path_on_cloud_drive',
-            'rclone',
-            'rclone_config_path',
-            'rclone_remote',
-            'rclone_verbose',
-        ],
-    )
-    allowed_keys = required_keys
-
     config_file_path = Path(str(value))
-    config_text = config_file_path.read_text(encoding='utf-8')
-    config = yaml.load(config_text, Loader=yaml.FullLoader) or {}
+    config = _load_config_file(config_file_path=config_file_path)
 
-    missing_required_keys = required_keys - config.keys()
-    extra_keys = config.keys() - allowed_keys
+    missing_required_keys = _REQUIRED_CONFIG_KEYS - config.keys()
+    extra_keys = config.keys() - _ALLOWED_CONFIG_KEYS
 
     if missing_required_keys:
         message = (
@@ -165,6 +266,8 @@ def _get_config(
         rclone_config_path=Path(config['rclone_config_path']),
         rclone_remote=str(config['rclone_remote']),
         rclone_verbose=bool(config['rclone_verbose']),
+        rclone_checkers=_optional_int(value=config.get('rclone_checkers')),
+        rclone_transfers=_optional_int(value=config.get('rclone_transfers')),
     )
 
 
@@ -187,6 +290,61 @@ def config_option(command: Callable[..., None]) -> Callable[..., None]:
     return function
 
 
+def _iter_files(root: Path) -> Iterator[os.DirEntry[str]]:
+    """
+    Yield directory entries for all files under the given directory.
+
+    ``os.scandir`` gives us the file type from the directory listing, so we
+    do not need an extra ``stat`` call for each path to find files.
+    As with ``Path.rglob``, symbolic links to directories are not followed,
+    and directories which cannot be read are skipped.
+    """
+    directories = [str(root)]
+    while directories:
+        try:
+            entries = os.scandir(directories.pop())
+        except OSError:
+            # The data directory may hold directories owned by other users,
+            # and directories may be deleted while we walk.
+            continue
+
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    directories.append(entry.path)
+                elif entry.is_file():
+                    yield entry
+
+
+def _unlink_if_exists(path: str) -> None:
+    """
+    Delete a file, ignoring it if it has already been deleted.
+    """
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _remove_empty_dirs(directories: Iterable[str], root: Path) -> None:
+    """
+    Remove each of the given directories, and then its parents, while they
+    are empty.
+
+    ``root`` itself is never removed, and nor are UnionFS hidden directories.
+    """
+    root_path = str(root)
+    for directory in directories:
+        while directory != root_path and not directory.endswith(_HIDDEN_FLAG):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                # The directory is not empty, or it has already been removed
+                # along with another of the given directories.
+                break
+            directory = os.path.dirname(directory)
+
+
 def _local_cleanup(days_to_keep_local: float, local_decrypted: Path) -> None:
     """
     Delete local data older than "days_to_keep_local" from the configuration
@@ -200,15 +358,36 @@ def _local_cleanup(days_to_keep_local: float, local_decrypted: Path) -> None:
 
     seconds_to_keep_local = days_to_keep_local * 24 * 60 * 60
 
-    file_paths = local_decrypted.rglob('*')
+    file_entries = _iter_files(root=local_decrypted)
 
-    now_timestamp = datetime.datetime.now().timestamp()
+    now_timestamp = time.time()
     oldest_acceptable_time = now_timestamp - seconds_to_keep_local
 
-    for path in file_paths:
-        ctime = path.stat().st_ctime
-        if path.is_file() and ctime < oldest_acceptable_time:
-            path.unlink()
+    stale_file_paths = (
+        file_entry.path
+        for file_entry in file_entries
+        if file_entry.stat().st_ctime < oldest_acceptable_time
+    )
+
+    # Each deletion waits on the filesystem, so we run many at once.
+    # Paths are handled in chunks so that we do not hold every stale path in
+    # memory at once.
+    chunk_size = 10_000
+    max_unlink_workers = min(32, (os.cpu_count() or 1) * 4)
+    # Directories emptied by the cleanup are removed so that later walks do
+    # not have to visit them.
+    parent_dirs: set[str] = set()
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max_unlink_workers,
+    ) as executor:
+        while True:
+            chunk = list(itertools.islice(stale_file_paths, chunk_size))
+            if not chunk:
+                break
+            parent_dirs.update(os.path.dirname(path) for path in chunk)
+            list(executor.map(_unlink_if_exists, chunk))
+
+    _remove_empty_dirs(directories=parent_dirs, root=local_decrypted)
 
     message = (
         f'Finished deleting local files older than "{days_to_keep_local}" '
@@ -218,29 +397,118 @@ def _local_cleanup(days_to_keep_local: float, local_decrypted: Path) -> None:
     LOGGER.info(message)
 
 
+def _escape_proc_mounts_path(path: str) -> bytes:
+    """
+    Return a path as it is written in ``/proc/mounts``.
+    """
+    escaped = os.fsencode(path)
+    for character, escape in _PROC_MOUNTS_ESCAPES:
+        escaped = escaped.replace(character, escape)
+    return escaped
+
+
+def _unescape_proc_mounts_path(escaped: bytes) -> str:
+    """
+    Return a path given as it is written in ``/proc/mounts``.
+    """
+    for character, escape in reversed(_PROC_MOUNTS_ESCAPES):
+        escaped = escaped.replace(escape, character)
+    return os.fsdecode(escaped)
+
+
 def _is_mountpoint(name: str) -> bool:
-    proc_mounts = Path('/proc/mounts').read_text(encoding='utf-8').split('\n')
-    for mount_line in proc_mounts:
-        if mount_line:
-            path = mount_line.split()[1]
-            if path == name:
+    """
+    Return whether the given path is a mountpoint.
+
+    ``os.path.ismount`` needs only two ``stat`` calls, so we try it first.
+    It returns ``False`` when the path cannot be read, such as a FUSE mount
+    whose process has died, and those are mounts that we most need to
+    unmount.
+    In that case we fall back to ``/proc/mounts``, which we read line by
+    line so that we can stop at the first match.
+    """
+    if os.path.ismount(name):
+        return True
+
+    # The kernel lists resolved absolute paths.
+    target = _escape_proc_mounts_path(path=os.path.realpath(name))
+    with _PROC_MOUNTS.open('rb') as proc_mounts:
+        for mount_line in proc_mounts:
+            fields = mount_line.split(b' ', 2)
+            if len(fields) > 1 and fields[1] == target:
                 return True
     return False
 
 
-def _unmount(mountpoint: Path) -> None:
+def _current_mountpoints() -> frozenset[str]:
+    """
+    Return the paths of all mountpoints listed in ``/proc/mounts``.
+
+    This lets callers which check several paths read the mount table once.
+    """
+    mountpoints = set()
+    with _PROC_MOUNTS.open('rb') as proc_mounts:
+        for mount_line in proc_mounts:
+            fields = mount_line.split(b' ', 2)
+            if len(fields) > 1:
+                mountpoints.add(_unescape_proc_mounts_path(escaped=fields[1]))
+    return frozenset(mountpoints)
+
+
+def _unmount_with_system_call(mountpoint: Path) -> bool:
+    """
+    Unmount a mountpoint with ``umount2``, and return whether that worked.
+
+    This saves starting a ``fusermount`` process.
+    It needs privileges which ``fusermount`` does not, such as running as
+    root, and so callers should fall back to ``fusermount`` when it fails.
+    """
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        umount2 = libc.umount2
+    except (AttributeError, OSError):
+        return False
+
+    # We do not pass ``MNT_DETACH``, so that, as with ``fusermount -u``, a
+    # busy mountpoint is not unmounted.
+    if umount2(os.fsencode(mountpoint), 0) == 0:
+        return True
+
+    error_message = os.strerror(ctypes.get_errno())
+    message = f'umount2 failed for "{mountpoint}": {error_message}'
+    LOGGER.debug(msg=message)
+    return False
+
+
+def _unmount(
+    mountpoint: Path,
+    mountpoints: frozenset[str] | None = None,
+) -> None:
     """
     Unmount a mountpoint. Will not unmount if not already mounted.
 
+    If ``mountpoints`` is given, it is used to check whether the path is
+    mounted, rather than looking this up again.
+    The kernel lists resolved absolute paths, so we resolve the given path,
+    which may be relative or go through a symlink, before looking for it.
+
     This does not work on macOS as ``fusermount`` does not exist.
     """
-    if not _is_mountpoint(name=str(mountpoint)):
+    if mountpoints is None:
+        is_mounted = _is_mountpoint(name=str(mountpoint))
+    else:
+        is_mounted = os.path.realpath(mountpoint) in mountpoints
+
+    if not is_mounted:
         message = f'Cannot unmount "{mountpoint}" - it is not mounted'
         LOGGER.warning(msg=message)
         return
 
     message = f'Unmounting "{mountpoint}"'
     LOGGER.info(msg=message)
+    if _unmount_with_system_call(mountpoint=mountpoint):
+        return
+
     unmount_args = ['fusermount', '-u', str(mountpoint)]
     subprocess.run(args=unmount_args, check=True)
 
@@ -257,12 +525,15 @@ def unmount_all(config: _Config) -> None:
     local_encrypted = config.local_encrypted
     data_dir = config.data_dir
 
-    _unmount(mountpoint=data_dir)
+    mountpoints = _current_mountpoints()
+    _unmount(mountpoint=data_dir, mountpoints=mountpoints)
     unmount_lock_file.touch()
-    _unmount(mountpoint=remote_encrypted)
+    _unmount(mountpoint=remote_encrypted, mountpoints=mountpoints)
 
     attempts = 0
     max_attempts = 10
+    # We check again as soon as the mount table changes, so this is only the
+    # longest we wait between checks.
     sleep_seconds = 1
 
     # We do not use ``remote_mount.is_mount()`` as that was only added in
@@ -276,14 +547,27 @@ def unmount_all(config: _Config) -> None:
             )
             LOGGER.error(message)
 
-        time.sleep(sleep_seconds)
+        _wait_for_mount_table_change(timeout_seconds=sleep_seconds)
 
     try:
         unmount_lock_file.unlink()
     except FileNotFoundError:
         pass
-    _unmount(mountpoint=remote_decrypted)
-    _unmount(mountpoint=local_encrypted)
+
+    # Unmounting the cloud drive may have changed what else is mounted.
+    mountpoints = _current_mountpoints()
+    _unmount(mountpoint=remote_decrypted, mountpoints=mountpoints)
+    _unmount(mountpoint=local_encrypted, mountpoints=mountpoints)
+
+
+def _has_children(directory: Path) -> bool:
+    """
+    Return whether the given directory has any entries.
+
+    This stops reading the directory at the first entry.
+    """
+    with os.scandir(directory) as entries:
+        return next(entries, None) is not None
 
 
 @click.command('upload')
@@ -293,41 +577,42 @@ def upload(ctx: click.core.Context, config: _Config) -> None:
     """
     Upload local data to the cloud.
     """
-    upload_pid_file = Path(__file__).parent / 'upload.pid'
-    if upload_pid_file.exists():
-        running_pid = upload_pid_file.read_text()
-        if running_pid:
-            proc_file = Path('/proc') / running_pid
-            if proc_file.exists():
-                message = 'Upload script already running'
-                LOGGER.error(msg=message)
-                ctx.fail(message=message)
+    # The kernel releases the lock when the file descriptor is closed,
+    # including when this process exits, so a stale file never blocks an
+    # upload.
+    upload_pid_fd = os.open(_UPLOAD_PID_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+    ctx.call_on_close(functools.partial(os.close, upload_pid_fd))
+    try:
+        fcntl.flock(upload_pid_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        message = 'Upload script already running'
+        LOGGER.error(msg=message)
+        ctx.fail(message=message)
 
+    # The PID is not used for locking but it is useful when debugging.
     current_pid = os.getpid()
-    upload_pid_file.write_text(str(current_pid))
+    os.ftruncate(upload_pid_fd, 0)
+    os.write(upload_pid_fd, str(current_pid).encode())
     _sync_deletes(
         local_decrypted=config.local_decrypted,
         encfs_pass=config.encfs_pass,
+        encfs6_config=config.encfs6_config,
         remote_encrypted=config.remote_encrypted,
         rclone_remote=config.rclone_remote,
         path_on_cloud_drive=config.path_on_cloud_drive,
-        rclone_config_path=config.rclone_config_path,
-        rclone=config.rclone,
-        rclone_verbose=config.rclone_verbose,
+        rclone_base_args=config.rclone_base_args,
     )
 
     # Determine the .unionfs-fuse directory name as to not upload it
     exclude_name = _encode_with_encfs(
         path_or_file_name='.unionfs-fuse',
         encfs_pass=config.encfs_pass,
+        encfs6_config=config.encfs6_config,
         root_dir=config.remote_encrypted,
     )
 
     upload_args = [
-        str(config.rclone),
-        '--config',
-        str(config.rclone_config_path),
-        _rclone_verbosity_flag(verbose=config.rclone_verbose),
+        *config.rclone_base_args,
         'copy',
         # Try to avoid Google 403: User Rate Limit Exceeded.
         # This happens when 10 total transfers happen in a second.
@@ -340,6 +625,7 @@ def upload(ctx: click.core.Context, config: _Config) -> None:
         '--drive-stop-on-upload-limit',
         # Make fewer API requests.
         '--fast-list',
+        *_RCLONE_RETRIES_SLEEP_ARGS,
         # Exclude the ``.unionfs-fuse`` directory as this is where files to be
         # deleted go.
         '--exclude',
@@ -352,8 +638,14 @@ def upload(ctx: click.core.Context, config: _Config) -> None:
         ),
     ]
 
-    children = config.local_encrypted.glob('*')
-    if children:
+    # More parallel transfers and checks help when there are many small
+    # files, up to the limits of the cloud drive.
+    if config.rclone_transfers is not None:
+        upload_args += ['--transfers', str(config.rclone_transfers)]
+    if config.rclone_checkers is not None:
+        upload_args += ['--checkers', str(config.rclone_checkers)]
+
+    if _has_children(directory=config.local_encrypted):
         subprocess.run(args=upload_args, check=True)
     else:
         message = f'{config.local_encrypted} is empty - nothing to upload'
@@ -365,18 +657,241 @@ def upload(ctx: click.core.Context, config: _Config) -> None:
         days_to_keep_local=config.days_to_keep_local,
         local_decrypted=config.local_decrypted,
     )
-    upload_pid_file.unlink()
 
 
-def _sync_deletes(  # pylint:disable=too-many-statements
+def _delete_files_from_cloud_drive(
+    rclone_base_args: Sequence[str],
+    rclone_root_path: str,
+    hidden_files: Sequence[tuple[Path, str]],
+) -> None:
+    """
+    Delete files from the cloud drive and remove their UnionFS hidden files.
+
+    ``hidden_files`` pairs each hidden file with the encoded path of the file
+    to delete, relative to ``rclone_root_path``.
+    ``rclone`` skips any listed file which is not on the cloud drive.
+    """
+    if not hidden_files:
+        return
+
+    # One ``rclone`` call deletes every file, rather than one ``ls`` and one
+    # ``delete`` per file.
+    with tempfile.NamedTemporaryFile(
+        mode='w',
+        encoding='utf-8',
+        errors='surrogateescape',
+        suffix='.txt',
+    ) as files_from:
+        for _, encname in hidden_files:
+            files_from.write(f'{encname}\n')
+        files_from.flush()
+
+        rclone_delete_args = [
+            *rclone_base_args,
+            'delete',
+            *_RCLONE_RETRIES_SLEEP_ARGS,
+            '--files-from',
+            files_from.name,
+            rclone_root_path,
+        ]
+        subprocess.run(args=rclone_delete_args, check=True)
+
+    # ``rclone`` does not tell us which of the files it found, so we do not
+    # claim that each one was deleted.
+    message = (
+        f'Requested deletion of {len(hidden_files)} files from cloud drive'
+    )
+    LOGGER.info(message)
+
+    # Remove the UnionFS hidden files.
+    for matched_file, _ in hidden_files:
+        matched_file.unlink()
+
+
+def _remove_dir_if_exists(path: Path) -> None:
+    """
+    Delete a directory and everything in it, ignoring it if it does not
+    exist.
+
+    Directories are often already empty, and then one ``rmdir`` call is
+    enough, so we only walk the tree when that fails.
+    """
+    try:
+        os.rmdir(path)
+    except FileNotFoundError:
+        pass
+    except OSError:
+        shutil.rmtree(path)
+
+
+def _purge_dir_from_cloud_drive(
+    rclone_base_args: Sequence[str],
+    rclone_path: str,
+) -> bool:
+    """
+    Delete a directory from the cloud drive if it is there.
+
+    Return whether the directory was on the cloud drive.
+
+    ``rclone_base_args`` are the ``rclone`` executable and global options.
+    """
+    # We use purge rather than delete because ``rclone delete`` does not
+    # delete directories, only their contents.
+    rclone_purge_args = [
+        *rclone_base_args,
+        'purge',
+        *_RCLONE_RETRIES_SLEEP_ARGS,
+        rclone_path,
+    ]
+
+    # ``rclone`` exits with one of these codes when the directory is not on
+    # the cloud drive, so we do not need to check for it first.
+    not_found_exit_codes = {3, 4}
+
+    # We collect the output so that concurrent purges do not interleave
+    # their output on the terminal.
+    rclone_output = subprocess.run(
+        args=rclone_purge_args,
+        check=False,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    if rclone_output.returncode in not_found_exit_codes:
+        return False
+
+    click.echo(rclone_output.stdout, err=True, nl=False)
+    rclone_output.check_returncode()
+    return True
+
+
+def _purge_dirs_from_cloud_drive(
+    rclone_base_args: Sequence[str],
+    hidden_dirs: Sequence[tuple[Path, Path, str]],
+    search_dir: Path,
+) -> None:
+    """
+    Delete directories from the cloud drive and remove their UnionFS hidden
+    directories.
+    """
+    # Each purge spends most of its time waiting on the network, so we run a
+    # few at once, and remove local directories as their purges finish.
+    # We keep this small to avoid hitting Google's rate limits.
+    max_purge_workers = 4
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max_purge_workers,
+    ) as executor:
+        purge_futures = []
+        for _, _, rclone_path in hidden_dirs:
+            message = f'Attempting to delete "{rclone_path}"'
+            LOGGER.info(message)
+            purge_future = executor.submit(
+                _purge_dir_from_cloud_drive,
+                rclone_base_args=rclone_base_args,
+                rclone_path=rclone_path,
+            )
+            purge_futures.append(purge_future)
+
+        for (
+            (matched_file, not_hidden_relative_file, _),
+            purge_future,
+        ) in zip(hidden_dirs, purge_futures):
+            if purge_future.result():
+                message = f'{matched_file} deleted from cloud drive'
+            else:
+                message = f'{not_hidden_relative_file} is not on a cloud drive'
+            LOGGER.info(message)
+
+            # We delete the folder "<FOLDER_NAME>_HIDDEN~" but also the
+            # matching directory, if it exists, which contains any
+            # sub-directories or files.
+            #
+            # This means we do not have to have a list of failed purges on
+            # those directories.
+            _remove_dir_if_exists(path=matched_file)
+            _remove_dir_if_exists(path=search_dir / not_hidden_relative_file)
+
+
+def _iter_hidden_entries(root: Path) -> Iterator[os.DirEntry[str]]:
+    """
+    Yield directory entries for all UnionFS hidden objects under the given
+    directory.
+
+    Only names are compared, so non-matching entries need no ``stat`` call.
+    Hidden directories are not walked, as everything in them is deleted
+    along with them.
+    """
+    directories = [str(root)]
+    while directories:
+        try:
+            entries = os.scandir(directories.pop())
+        except OSError:
+            # As with ``Path.rglob``, we skip directories which we cannot
+            # read, or which were deleted while we walk.
+            continue
+
+        with entries:
+            for entry in entries:
+                if entry.name.endswith(_HIDDEN_FLAG):
+                    yield entry
+                elif entry.is_dir(follow_symlinks=False):
+                    directories.append(entry.path)
+
+
+def _find_hidden_objects(
+    search_dir: Path,
+) -> list[tuple[Path, Path, bool]]:
+    """
+    Return the UnionFS hidden objects to delete, in a stable order.
+
+    Each item is a hidden object, the path, relative to ``search_dir``, of
+    the object which it hides, and whether the hidden object is a directory.
+    Hidden objects inside a hidden directory's unhidden counterpart are
+    left out, as they are deleted along with that directory.
+    """
+    hidden_relative_paths: list[tuple[Path, Path, bool]] = []
+    for hidden_entry in _iter_hidden_entries(root=search_dir):
+        hidden_relative_path = Path(hidden_entry.path).relative_to(search_dir)
+        hidden_relative_name = str(hidden_relative_path)
+        assert hidden_relative_name.endswith(_HIDDEN_FLAG)
+        not_hidden_relative_path = Path(
+            hidden_relative_name[: -len(_HIDDEN_FLAG)],
+        )
+        hidden_relative_paths.append(
+            (
+                hidden_relative_path,
+                not_hidden_relative_path,
+                hidden_entry.is_dir(),
+            ),
+        )
+
+    # ``_iter_hidden_entries`` does not walk hidden directories, so only the
+    # unhidden counterparts can contain other hidden objects.
+    removed_dirs = {
+        not_hidden_relative_path
+        for _, not_hidden_relative_path, is_dir in hidden_relative_paths
+        if is_dir
+    }
+
+    return sorted(
+        (search_dir / hidden_relative_path, not_hidden_relative_path, is_dir)
+        for (
+            hidden_relative_path,
+            not_hidden_relative_path,
+            is_dir,
+        ) in hidden_relative_paths
+        if not removed_dirs.intersection(hidden_relative_path.parents)
+    )
+
+
+def _sync_deletes(
     local_decrypted: Path,
     encfs_pass: str,
+    encfs6_config: Path,
     remote_encrypted: Path,
     rclone_remote: str,
     path_on_cloud_drive: str,
-    rclone_config_path: Path,
-    rclone: Path,
-    rclone_verbose: bool,
+    rclone_base_args: Sequence[str],
 ) -> None:
     search_dir = local_decrypted / '.unionfs-fuse'
 
@@ -385,29 +900,28 @@ def _sync_deletes(  # pylint:disable=too-many-statements
         LOGGER.info(message)
         return
 
-    hidden_flag = '_HIDDEN~'
-    matched_files = search_dir.rglob(pattern='*' + hidden_flag)
+    hidden_objects = _find_hidden_objects(search_dir=search_dir)
 
-    failed_sync_deletes = False
+    encnames = _encode_many_with_encfs(
+        paths_or_file_names=[
+            str(not_hidden_relative_file)
+            for _, not_hidden_relative_file, _ in hidden_objects
+        ],
+        encfs_pass=encfs_pass,
+        encfs6_config=encfs6_config,
+        root_dir=remote_encrypted,
+    )
 
-    for matched_file in matched_files:
-        if not matched_file.exists():
-            # It could be that the matched file was under a directory which
-            # has now been deleted.
-            continue
+    failed_sync_deletes = False
+    hidden_files: list[tuple[Path, str]] = []
+    hidden_dirs: list[tuple[Path, Path, str]] = []
 
+    for (matched_file, not_hidden_relative_file, is_dir), encname in zip(
+        hidden_objects,
+        encnames,
+    ):
         message = f'{matched_file} exists locally'
         LOGGER.info(message)
-        hidden_relative_file_path = matched_file.relative_to(search_dir)
-        assert str(hidden_relative_file_path).endswith(hidden_flag)
-        not_hidden_relative_file = Path(
-            str(hidden_relative_file_path)[: -len(hidden_flag)],
-        )
-        encname = _encode_with_encfs(
-            path_or_file_name=str(not_hidden_relative_file),
-            encfs_pass=encfs_pass,
-            root_dir=remote_encrypted,
-        )
 
         if not encname:
             message = 'Empty name returned from encfsctl - skipping.'
@@ -415,79 +929,39 @@ def _sync_deletes(  # pylint:disable=too-many-statements
             failed_sync_deletes = True
             continue
 
-        rclone_path = _rclone_path(
-            rclone_remote=rclone_remote,
-            rclone_root=path_on_cloud_drive,
-            rclone_relative_path=encname,
-        )
-
-        message = f'Attempting to delete "{rclone_path}"'
-        LOGGER.info(message)
-
-        rclone_args = [
-            str(rclone),
-            '--config',
-            str(rclone_config_path),
-            _rclone_verbosity_flag(verbose=rclone_verbose),
-            'ls',
-            '--max-depth',
-            '1',
-            rclone_path,
-        ]
-
-        rclone_output = subprocess.run(args=rclone_args, check=False)
-        rclone_status_code = rclone_output.returncode
-        if rclone_status_code:
-            # This may be shown for each file in a directory if a directory is
-            # deleted.
-            message = f'{not_hidden_relative_file} is not on a cloud drive'
-            LOGGER.info(message)
-        else:
-            message = (
-                f'{not_hidden_relative_file} exists on cloud drive - deleting'
+        # The file type comes from the directory listing, so this needs no
+        # ``stat`` call.
+        if is_dir:
+            rclone_path = _rclone_path(
+                rclone_remote=rclone_remote,
+                rclone_root=path_on_cloud_drive,
+                rclone_relative_path=encname,
+            )
+            hidden_dirs.append(
+                (matched_file, not_hidden_relative_file, rclone_path),
             )
-            LOGGER.info(message)
-
-            if matched_file.is_file():
-                delete_cmd = 'delete'
-            else:
-                # We use purge rather than delete because ``rclone delete``
-                # does not delete directories, only their contents.
-                delete_cmd = 'purge'
-
-            rclone_delete_args = [
-                str(rclone),
-                '--config',
-                str(rclone_config_path),
-                _rclone_verbosity_flag(verbose=rclone_verbose),
-                delete_cmd,
-                rclone_path,
-            ]
-
-            subprocess.run(args=rclone_delete_args, check=True)
-            message = f'{matched_file} deleted from cloud drive'
-            LOGGER.info(message)
-
-        # Remove the UnionFS hidden object.
-        if matched_file.is_file():
-            matched_file.unlink()
         else:
-            # We delete the folder "<FOLDER_NAME>_HIDDEN~" but also the
-            # matching directory, if it exists, which contains any
-            # sub-directories or files.
-            #
-            # This means we do not have to have a list of failed ``ls``s on
-            # those directories.
-            shutil.rmtree(matched_file)
+            hidden_files.append((matched_file, encname))
 
-            non_hidden_version = Path(str(matched_file)[: -len(hidden_flag)])
-            if non_hidden_version.exists():
-                shutil.rmtree(non_hidden_version)
+    _delete_files_from_cloud_drive(
+        rclone_base_args=rclone_base_args,
+        rclone_root_path=_rclone_path(
+            rclone_remote=rclone_remote,
+            rclone_root=path_on_cloud_drive,
+            rclone_relative_path=None,
+        ),
+        hidden_files=hidden_files,
+    )
+    _purge_dirs_from_cloud_drive(
+        rclone_base_args=rclone_base_args,
+        hidden_dirs=hidden_dirs,
+        search_dir=search_dir,
+    )
 
     if not failed_sync_deletes:
         # Delete the search directory so that it is not uploaded as an
         # empty directory.
-        shutil.rmtree(search_dir)
+        _remove_dir_if_exists(path=search_dir)
         return
 
     message = 'Not clearing .unionfs directory as there were failures.'
@@ -503,12 +977,11 @@ def sync_deletes(config: _Config) -> None:
     _sync_deletes(
         local_decrypted=config.local_decrypted,
         encfs_pass=config.encfs_pass,
+        encfs6_config=config.encfs6_config,
         remote_encrypted=config.remote_encrypted,
         rclone_remote=config.rclone_remote,
         path_on_cloud_drive=config.path_on_cloud_drive,
-        rclone_config_path=config.rclone_config_path,
-        rclone=config.rclone,
-        rclone_verbose=config.rclone_verbose,
+        rclone_base_args=config.rclone_base_args,
     )
 
 
@@ -548,43 +1021,79 @@ def _create_dirs(
             LOGGER.info(message)
 
 
+def _wait_for_mount_table_change(timeout_seconds: float) -> None:
+    """
+    Wait until a filesystem is mounted or unmounted, or until the timeout.
+
+    Mounting a filesystem on a directory does not cause an inotify event for
+    that directory.
+    Instead, the kernel flags ``/proc/self/mounts`` with ``POLLPRI`` when the
+    mount table changes.
+    Where that file does not exist, this sleeps for the whole timeout.
+    """
+    try:
+        proc_mounts = _PROC_SELF_MOUNTS.open('rb')
+    except OSError:
+        time.sleep(timeout_seconds)
+        return
+
+    with proc_mounts:
+        poller = select.poll()
+        poller.register(proc_mounts, select.POLLPRI)
+        poller.poll(timeout_seconds * 1000)
+
+
 def _wait_for_remote_mount(
     max_attempts: int,
     ctx: click.core.Context,
-    remote_encrypted: Path,
-    path_on_cloud_drive: str,
+    remote_mount: Path,
 ) -> None:
     """
-    Wait for the rclone mount or error if it does not start within some time
-    close to 25 seconds.
+    Wait for the rclone mount or error if it does not start within
+    ``max_attempts`` times five seconds.
+
+    We check again as soon as the mount table changes, rather than only
+    every five seconds.
     """
-    relative_path_on_cloud_drive = Path(path_on_cloud_drive).relative_to('/')
-    remote_mount = remote_encrypted / relative_path_on_cloud_drive
-    attempts = 0
     sleep_seconds = 5
+    timeout_seconds = max_attempts * sleep_seconds
+    deadline = time.monotonic() + timeout_seconds
 
     while not remote_mount.exists():
-        attempts += 1
-        if attempts > max_attempts:
+        seconds_left = deadline - time.monotonic()
+        if seconds_left <= 0:
             message = (
-                f'Remote mount not found after {max_attempts} attempts, '
+                f'Remote mount not found after {timeout_seconds} seconds, '
                 'exiting.'
             )
             ctx.fail(message)
 
         message = f'Remote mount {remote_mount} does not exist yet, waiting.'
         LOGGER.info(message)
-        time.sleep(sleep_seconds)
+        _wait_for_mount_table_change(
+            timeout_seconds=min(sleep_seconds, seconds_left),
+        )
+
+
+def _encfs_env(encfs_pass: str, encfs6_config: Path) -> dict[str, str]:
+    """
+    Return the environment to run ``encfs`` and ``encfsctl`` with.
+    """
+    return {
+        **os.environ,
+        'ENCFS6_CONFIG': str(encfs6_config),
+        _ENCFS_PASS_ENV_VAR: encfs_pass,
+    }
 
 
 def _mount_data_dir(
-    remote_encrypted: Path,
+    remote_mount: Path,
     remote_decrypted: Path,
     local_encrypted: Path,
     local_decrypted: Path,
     data_dir: Path,
     encfs_pass: str,
-    path_on_cloud_drive: str,
+    encfs6_config: Path,
 ) -> None:
     """
     Mount the local data directory.
@@ -592,30 +1101,45 @@ def _mount_data_dir(
     This expects that the cloud drive is mounted.
     """
 
-    message = 'Mounting local encrypted filesystem'
-    LOGGER.info(message)
-    encfs_args = [
+    local_encfs_args = [
         'encfs',
         '--extpass',
-        f'echo {encfs_pass}',
+        _ENCFS_EXTPASS,
         '--reverse',
         str(local_decrypted),
         str(local_encrypted),
     ]
-    subprocess.run(args=encfs_args, check=True)
-
-    relative_path_on_cloud_drive = Path(path_on_cloud_drive).relative_to('/')
-    remote_mount = remote_encrypted / relative_path_on_cloud_drive
-    message = 'Mounting cloud decrypted filesystem'
-    LOGGER.info(message)
-    encfs_args = [
+    remote_encfs_args = [
         'encfs',
         '--extpass',
-        f'echo {encfs_pass}',
+        _ENCFS_EXTPASS,
         str(remote_mount),
         str(remote_decrypted),
     ]
-    subprocess.run(args=encfs_args, check=True)
+    encfs_env = _encfs_env(
+        encfs_pass=encfs_pass,
+        encfs6_config=encfs6_config,
+    )
+
+    # The two encfs mounts do not depend on each other, and each spends
+    # most of its time deriving the volume key, so we run them at once.
+    message = 'Mounting local encrypted and cloud decrypted filesystems'
+    LOGGER.info(message)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        encfs_futures = [
+            executor.submit(
+                subprocess.run,
+                args=encfs_args,
+                check=True,
+                env=encfs_env,
+            )
+            for encfs_args in (local_encfs_args, remote_encfs_args)
+        ]
+
+    # We only raise errors after both ``encfs`` processes have exited, so
+    # that neither is still starting when this command exits.
+    for encfs_future in encfs_futures:
+        encfs_future.result()
 
     message = 'Mounting UnionFS'
     LOGGER.info(message)
@@ -639,18 +1163,17 @@ def mount_data_dir(ctx: click.core.Context, config: _Config) -> None:
     _wait_for_remote_mount(
         ctx=ctx,
         max_attempts=config.max_retries_remote_mount,
-        remote_encrypted=config.remote_encrypted,
-        path_on_cloud_drive=config.path_on_cloud_drive,
+        remote_mount=config.remote_mount,
     )
 
     _mount_data_dir(
-        remote_encrypted=config.remote_encrypted,
+        remote_mount=config.remote_mount,
         remote_decrypted=config.remote_decrypted,
         local_encrypted=config.local_encrypted,
         local_decrypted=config.local_decrypted,
         data_dir=config.data_dir,
         encfs_pass=config.encfs_pass,
-        path_on_cloud_drive=config.path_on_cloud_drive,
+        encfs6_config=config.encfs6_config,
     )
 
 
@@ -706,19 +1229,25 @@ def _mount_cloud_storage(
     unmount_lock_file.unlink()
 
 
+@functools.lru_cache(maxsize=4096)
 def _encode_with_encfs(
     encfs_pass: str,
+    encfs6_config: Path,
     path_or_file_name: str,
     root_dir: Path,
 ) -> str:
     """
     Return an encfs encoded path.
+
+    Results are cached in memory for the lifetime of the process so that
+    encoding the same path twice does not run ``encfsctl`` twice.
+    The cache is never written to disk.
     """
     encfsctl_args = [
         'encfsctl',
         'encode',
         '--extpass',
-        f'echo {encfs_pass}',
+        _ENCFS_EXTPASS,
         str(root_dir),
         path_or_file_name,
     ]
@@ -726,15 +1255,73 @@ def _encode_with_encfs(
     encfsctl_result = subprocess.run(
         args=encfsctl_args,
         check=True,
+        env=_encfs_env(
+            encfs_pass=encfs_pass,
+            encfs6_config=encfs6_config,
+        ),
+        stdin=subprocess.DEVNULL,
         stdout=subprocess.PIPE,
     )
 
-    encname = encfsctl_result.stdout.decode().strip()
+    encname = os.fsdecode(encfsctl_result.stdout.strip())
     return encname
 
 
+def _encode_many_with_encfs(
+    encfs_pass: str,
+    encfs6_config: Path,
+    paths_or_file_names: Sequence[str],
+    root_dir: Path,
+) -> list[str]:
+    """
+    Return encfs encoded paths in the same order as the given paths.
+
+    ``encfsctl`` derives the volume key every time that it starts, so we
+    encode every path with one ``encfsctl`` process rather than running it
+    once for each path.
+    """
+    if not paths_or_file_names:
+        return []
+
+    # Given no paths as arguments, ``encfsctl encode`` reads paths from
+    # stdin, one per line.
+    # This avoids ``encfsctl``'s limit on the number of arguments, and means
+    # that paths which start with ``-`` are not parsed as options.
+    encfsctl_args = [
+        'encfsctl',
+        'encode',
+        '--extpass',
+        _ENCFS_EXTPASS,
+        str(root_dir),
+    ]
+    encfsctl_input = b''.join(
+        os.fsencode(path_or_file_name) + b'\n'
+        for path_or_file_name in paths_or_file_names
+    )
+
+    encfsctl_result = subprocess.run(
+        args=encfsctl_args,
+        check=True,
+        env=_encfs_env(
+            encfs_pass=encfs_pass,
+            encfs6_config=encfs6_config,
+        ),
+        input=encfsctl_input,
+        stdout=subprocess.PIPE,
+    )
+
+    encnames = encfsctl_result.stdout.splitlines()
+    message = (
+        f'Expected {len(paths_or_file_names)} encoded paths from encfsctl '
+        f'but got {len(encnames)}.'
+    )
+    assert len(encnames) == len(paths_or_file_names), message
+    return [os.fsdecode(encname.strip()) for encname in encnames]
+
+
 def _decode_with_encfs(
     encfs_pass: str,
+    encfs6_config: Path,
     path_or_file_name: str,
     root_dir: Path,
 ) -> str:
@@ -745,7 +1332,7 @@ def _decode_with_encfs(
         'encfsctl',
         'decode',
         '--extpass',
-        f'echo {encfs_pass}',
+        _ENCFS_EXTPASS,
         str(root_dir),
         path_or_file_name,
     ]
@@ -753,10 +1340,15 @@ def _decode_with_encfs(
     encfsctl_result = subprocess.run(
         args=encfsctl_args,
         check=True,
+        env=_encfs_env(
+            encfs_pass=encfs_pass,
+            encfs6_config=encfs6_config,
+        ),
+        stdin=subprocess.DEVNULL,
         stdout=subprocess.PIPE,
     )
 
-    encname = encfsctl_result.stdout.decode().strip()
+    encname = os.fsdecode(encfsctl_result.stdout.strip())
     return encname
 
 
@@ -770,6 +1362,7 @@ def show_encoded_path(config: _Config, decoded_path: str) -> None:
     encoded_path = _encode_with_encfs(
         path_or_file_name=decoded_path,
         encfs_pass=config.encfs_pass,
+        encfs6_config=config.encfs6_config,
         root_dir=config.remote_encrypted,
     )
     click.echo(encoded_path)
@@ -785,6 +1378,7 @@ def show_decoded_path(config: _Config, encoded_path: str) -> None:
     decoded_path = _decode_with_encfs(
         path_or_file_name=encoded_path,
         encfs_pass=config.encfs_pass,
+        encfs6_config=config.encfs6_config,
         root_dir=config.remote_encrypted,
     )
     click.echo(decoded_path)
@@ -801,11 +1395,13 @@ def move_file_or_dir(config: _Config, src: str, dst: str) -> None:
     encoded_src_path = _encode_with_encfs(
         path_or_file_name=src,
         encfs_pass=config.encfs_pass,
+        encfs6_config=config.encfs6_config,
         root_dir=config.remote_encrypted,
     )
     encoded_dst_path = _encode_with_encfs(
         path_or_file_name=dst,
         encfs_pass=config.encfs_pass,
+        encfs6_config=config.encfs6_config,
         root_dir=config.remote_encrypted,
     )
 
@@ -821,10 +1417,7 @@ def move_file_or_dir(config: _Config, src: str, dst: str) -> None:
     )
 
     move_args = [
-        str(config.rclone),
-        '--config',
-        str(config.rclone_config_path),
-        _rclone_verbosity_flag(verbose=config.rclone_verbose),
+        *config.rclone_base_args,
         'moveto',
         rclone_src_path,
         rclone_dst_path,
@@ -842,6 +1435,7 @@ def mkdir(config: _Config, path: str) -> None:
     encoded_path = _encode_with_encfs(
         path_or_file_name=path,
         encfs_pass=config.encfs_pass,
+        encfs6_config=config.encfs6_config,
         root_dir=config.remote_encrypted,
     )
 
@@ -852,10 +1446,7 @@ def mkdir(config: _Config, path: str) -> None:
     )
 
     move_args = [
-        str(config.rclone),
-        '--config',
-        str(config.rclone_config_path),
-        _rclone_verbosity_flag(verbose=config.rclone_verbose),
+        *config.rclone_base_args,
         'mkdir',
         rclone_path,
     ]
@@ -909,8 +1500,7 @@ def wait_for_cloud_storage_mount(
     _wait_for_remote_mount(
         ctx=ctx,
         max_attempts=config.max_retries_remote_mount,
-        remote_encrypted=config.remote_encrypted,
-        path_on_cloud_drive=config.path_on_cloud_drive,
+        remote_mount=config.remote_mount,
     )
 
 
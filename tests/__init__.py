@@ -0,0 +1,3 @@
+"""
+Tests for ``cloud_drive_tools``.
+"""
@@ -0,0 +1,77 @@
+"""
+Tests for the helpers in ``cloud_drive_tools.cloud_drive_tools``.
+"""
+
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from cloud_drive_tools.cloud_drive_tools import (
+    _encode_many_with_encfs,
+    _find_hidden_objects,
+)
+
+
+def test_objects_under_hidden_directory_are_skipped(tmp_path: Path) -> None:
+    """
+    Hidden objects inside a hidden directory are not returned, as they are
+    deleted along with that directory.
+    """
+    hidden_dir = tmp_path / 'foo_HIDDEN~'
+    hidden_dir.mkdir()
+    (tmp_path / 'foo').mkdir()
+    (tmp_path / 'foo' / 'bar_HIDDEN~').touch()
+    hidden_file = tmp_path / 'baz_HIDDEN~'
+    hidden_file.touch()
+
+    hidden_objects = _find_hidden_objects(search_dir=tmp_path)
+
+    assert hidden_objects == [
+        (hidden_file, Path('baz'), False),
+        (hidden_dir, Path('foo'), True),
+    ]
+
+
+def test_encode_many_with_encfs(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Paths are given to one ``encfsctl`` process on stdin, and the encoded
+    paths come back in the same order as the given paths.
+    """
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    encfsctl = bin_dir / 'encfsctl'
+    # This stands in for ``encfsctl``, which refuses more than 100
+    # arguments.
+    # It "encodes" a path by reversing it, and pads its output to check that
+    # the output is stripped.
+    encfsctl_source = textwrap.dedent(
+        f"""\
+        #!{sys.executable}
+        import sys
+
+        assert sys.argv[1:3] == ['encode', '--extpass'], sys.argv
+        assert len(sys.argv) == 5, sys.argv
+        for line in sys.stdin:
+            print(line.rstrip('\\n')[::-1] + ' ')
+        """,
+    )
+    encfsctl.write_text(encfsctl_source)
+    encfsctl.chmod(0o755)
+    monkeypatch.setenv('PATH', str(bin_dir))
+
+    paths_or_file_names = [f'dir/file-{index}' for index in range(120)]
+    paths_or_file_names.append('-name')
+
+    encnames = _encode_many_with_encfs(
+        encfs_pass='password',
+        encfs6_config=tmp_path / 'encfs6.xml',
+        paths_or_file_names=paths_or_file_names,
+        root_dir=tmp_path,
+    )
+
+    assert encnames == [path[::-1] for path in paths_or_file_names]
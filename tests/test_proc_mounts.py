@@ -0,0 +1,32 @@
+"""
+Tests for reading paths in ``/proc/mounts``.
+"""
+
+import pytest
+
+from cloud_drive_tools.cloud_drive_tools import (
+    _escape_proc_mounts_path,
+    _unescape_proc_mounts_path,
+)
+
+
+@pytest.mark.parametrize(
+    ('path', 'escaped'),
+    [
+        ('/mnt/plain', b'/mnt/plain'),
+        ('/mnt/with space', b'/mnt/with\\040space'),
+        ('/mnt/with\ttab', b'/mnt/with\\011tab'),
+        ('/mnt/with\nnewline', b'/mnt/with\\012newline'),
+        ('/mnt/with\\backslash', b'/mnt/with\\134backslash'),
+        # A backslash before something which looks like an escape must not
+        # be read back as that escape.
+        ('/mnt/\\040', b'/mnt/\\134040'),
+    ],
+)
+def test_round_trip(path: str, escaped: bytes) -> None:
+    """
+    Paths are escaped as the kernel writes them, and unescaping gives back
+    the original path.
+    """
+    assert _escape_proc_mounts_path(path=path) == escaped
+    assert _unescape_proc_mounts_path(escaped=escaped) == path
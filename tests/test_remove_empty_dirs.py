@@ -0,0 +1,79 @@
+"""
+Tests for removing directories emptied by local cleanup.
+"""
+
+from pathlib import Path
+
+from cloud_drive_tools.cloud_drive_tools import _remove_empty_dirs
+
+
+def test_empty_parents_are_removed(tmp_path: Path) -> None:
+    """
+    An empty directory and its empty parents are removed, up to the first
+    parent which is not empty.
+    """
+    kept = tmp_path / 'kept'
+    (kept / 'parent' / 'empty').mkdir(parents=True)
+    (kept / 'file').touch()
+
+    _remove_empty_dirs(
+        directories=[str(kept / 'parent' / 'empty')],
+        root=tmp_path,
+    )
+
+    assert not (kept / 'parent').exists()
+    assert kept.is_dir()
+
+
+def test_root_is_kept(tmp_path: Path) -> None:
+    """
+    The root directory is not removed, even when it is empty.
+    """
+    (tmp_path / 'empty').mkdir()
+
+    _remove_empty_dirs(directories=[str(tmp_path / 'empty')], root=tmp_path)
+
+    assert tmp_path.is_dir()
+    assert not list(tmp_path.iterdir())
+
+
+def test_hidden_directories_are_kept(tmp_path: Path) -> None:
+    """
+    UnionFS hidden directories are not removed, and nor are their parents,
+    as they mark objects to delete from the cloud drive.
+    """
+    hidden_dir = tmp_path / 'parent' / 'foo_HIDDEN~'
+    hidden_dir.mkdir(parents=True)
+
+    _remove_empty_dirs(directories=[str(hidden_dir)], root=tmp_path)
+
+    assert hidden_dir.is_dir()
+
+
+def test_directories_which_are_not_empty_are_kept(tmp_path: Path) -> None:
+    """
+    A directory with entries is not removed.
+    """
+    directory = tmp_path / 'directory'
+    directory.mkdir()
+    (directory / 'file').touch()
+
+    _remove_empty_dirs(directories=[str(directory)], root=tmp_path)
+
+    assert (directory / 'file').is_file()
+
+
+def test_already_removed_directories(tmp_path: Path) -> None:
+    """
+    Directories which were removed along with an earlier given directory
+    are ignored.
+    """
+    child = tmp_path / 'parent' / 'child'
+    child.mkdir(parents=True)
+
+    _remove_empty_dirs(
+        directories=[str(child), str(tmp_path / 'parent')],
+        root=tmp_path,
+    )
+
+    assert not (tmp_path / 'parent').exists()